@@ -1,16 +1,23 @@
 """
 Shim that exposes SmartAgriculture GCS helpers through the enzyme_tech namespace.
 """
+from typing import Iterable, Optional
+
 from google.cloud import storage
 
 from smart_agriculture.pipelines.gcs_utils import upload_files as _upload_files
 
 
-def upload_files(bucket_name: str, source_directory: str, destination_blob_prefix: str) -> None:
+def upload_files(
+    bucket_name: str,
+    source_directory: str,
+    destination_blob_prefix: str,
+    relative_paths: Optional[Iterable[str]] = None,
+) -> None:
     """
     Delegate to the canonical SmartAgriculture uploader.
     """
-    _upload_files(bucket_name, source_directory, destination_blob_prefix)
+    _upload_files(bucket_name, source_directory, destination_blob_prefix, relative_paths)
 
 
 __all__ = ["storage", "upload_files"]
@@ -0,0 +1,216 @@
+"""
+Dataset audit listing: relative path, size, mtime and SHA-256 for every file under a tree.
+
+Files are discovered with an ``os.scandir`` walker and handed to a thread pool as they are found,
+so walking and hashing overlap (hashlib releases the GIL on large buffers). Checksums from the
+previous listing are reused when a file's size and mtime are unchanged, so re-auditing a large
+dataset only reads what moved. The listing is checkpointed periodically, so an interrupted run
+keeps the hashes it already computed.
+
+Files that cannot be read stay in the listing with an empty ``sha256`` and the reason in ``error``.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import logging
+import os
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+LISTING_FILENAME = "file_list.csv"
+LISTING_COLUMNS = ["relative_path", "size", "mtime_ns", "sha256", "error"]
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DEFAULT_CHECKPOINT_SECONDS = 30.0
+CHUNK_SIZE = 1 << 20
+
+
+class FileEntry(NamedTuple):
+    relative_path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    error: str = ""
+
+
+def walk_files(root: Path) -> Iterator[Tuple[str, str, int, int]]:
+    """
+    Yield ``(absolute_path, relative_path, size, mtime_ns)`` for regular files under ``root``.
+
+    Symlinks are not followed; relative paths use forward slashes on every platform. Entries and
+    directories that vanish or cannot be read mid-walk are logged and skipped.
+    """
+    root_str = str(root)
+    stack = [root_str]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError as e:
+                            LOGGER.warning(f"Skipping file that could not be stat'ed {entry.path}: {e}")
+                            continue
+                        relative = os.path.relpath(entry.path, root_str).replace(os.sep, "/")
+                        yield entry.path, relative, stat.st_size, stat.st_mtime_ns
+        except OSError as e:
+            LOGGER.warning(f"Skipping unreadable directory {current}: {e}")
+
+
+def sha256_file(path: str) -> str:
+    """Stream a file through SHA-256 in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_entry(abs_path: str, relative: str, size: int, mtime_ns: int) -> FileEntry:
+    try:
+        return FileEntry(relative, size, mtime_ns, sha256_file(abs_path))
+    except OSError as e:
+        LOGGER.warning(f"Could not hash {abs_path}: {e}")
+        return FileEntry(relative, size, mtime_ns, "", str(e))
+
+
+def load_listing(listing_path: Path) -> Dict[str, FileEntry]:
+    """Read a previous listing keyed by relative path; missing files yield an empty dict."""
+    if not listing_path.exists():
+        return {}
+    with listing_path.open("r", newline="", encoding="utf-8") as handle:
+        return {
+            row["relative_path"]: FileEntry(
+                row["relative_path"], int(row["size"]), int(row["mtime_ns"]), row["sha256"], row.get("error") or ""
+            )
+            for row in csv.DictReader(handle)
+        }
+
+
+def _write_listing(listing_path: Path, entries: Iterable[FileEntry]) -> None:
+    listing_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = listing_path.with_suffix(".tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(LISTING_COLUMNS)
+        writer.writerows(sorted(entries, key=lambda entry: entry.relative_path))
+    os.replace(tmp_path, listing_path)  # the previous listing stays intact until the new one is complete
+
+
+def build_file_listing(
+    input_dir: Path,
+    listing_path: Path,
+    *,
+    workers: int = DEFAULT_WORKERS,
+    checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS,
+) -> Dict[str, float]:
+    """
+    Write the audit listing for ``input_dir`` to ``listing_path`` and return throughput stats.
+
+    Every ``checkpoint_seconds`` (and when interrupted) the listing is rewritten with the hashes
+    finished so far plus the previous entries not yet revisited, so a rerun reuses them.
+    The listing file itself is skipped when it lives inside ``input_dir``.
+    """
+    input_dir = Path(input_dir)
+    listing_path = Path(listing_path)
+    if not input_dir.exists():
+        msg = f"Input directory not found: {input_dir}"
+        LOGGER.error(msg)
+        raise FileNotFoundError(msg)
+
+    started = time.perf_counter()
+    previous = load_listing(listing_path)
+    skip = {os.path.abspath(listing_path), os.path.abspath(listing_path.with_suffix(".tmp"))}
+
+    entries: Dict[str, FileEntry] = {}
+    counts = {"reused": 0, "hashed": 0, "errors": 0, "hashed_bytes": 0}
+    # Workers post finished futures here so the walking thread can collect them without polling.
+    finished: "queue.SimpleQueue[Future[FileEntry]]" = queue.SimpleQueue()
+    outstanding = 0
+    last_checkpoint = time.monotonic()
+
+    def collect(future: "Future[FileEntry]") -> None:
+        nonlocal outstanding
+        outstanding -= 1
+        entry = future.result()
+        entries[entry.relative_path] = entry
+        if entry.error:
+            counts["errors"] += 1
+        else:
+            counts["hashed"] += 1
+            counts["hashed_bytes"] += entry.size
+
+    def checkpoint_if_due() -> None:
+        nonlocal last_checkpoint
+        if time.monotonic() - last_checkpoint >= checkpoint_seconds:
+            _write_listing(listing_path, {**previous, **entries}.values())
+            last_checkpoint = time.monotonic()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for abs_path, relative, size, mtime_ns in walk_files(input_dir):
+            if os.path.abspath(abs_path) in skip:
+                continue
+            known = previous.get(relative)
+            if known is not None and known.sha256 and known.size == size and known.mtime_ns == mtime_ns:
+                entries[relative] = known
+                counts["reused"] += 1
+            else:
+                outstanding += 1
+                pool.submit(_hash_entry, abs_path, relative, size, mtime_ns).add_done_callback(finished.put)
+            while not finished.empty():
+                collect(finished.get())
+            checkpoint_if_due()
+
+        while outstanding:
+            try:
+                collect(finished.get(timeout=max(checkpoint_seconds, 0.01)))
+            except queue.Empty:
+                pass
+            checkpoint_if_due()
+    except BaseException:
+        # Keep what was hashed before the interruption; queued files are dropped, running ones finish.
+        pool.shutdown(wait=True, cancel_futures=True)
+        while not finished.empty():
+            future = finished.get()
+            if not future.cancelled() and future.exception() is None:
+                collect(future)
+        _write_listing(listing_path, {**previous, **entries}.values())
+        raise
+    finally:
+        pool.shutdown(wait=True)
+
+    _write_listing(listing_path, entries.values())
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    stats = {
+        "files": float(len(entries)),
+        "hashed": float(counts["hashed"]),
+        "reused": float(counts["reused"]),
+        "errors": float(counts["errors"]),
+        "hashed_bytes": float(counts["hashed_bytes"]),
+        "seconds": elapsed,
+        "files_per_s": len(entries) / elapsed,
+        "mb_per_s": counts["hashed_bytes"] / elapsed / 1e6,
+    }
+    LOGGER.info(
+        "Audited %d files in %.2fs (%d hashed, %d reused, %d unreadable): %.1f files/s, %.1f MB/s hashed",
+        len(entries),
+        elapsed,
+        counts["hashed"],
+        counts["reused"],
+        counts["errors"],
+        stats["files_per_s"],
+        stats["mb_per_s"],
+    )
+    return stats
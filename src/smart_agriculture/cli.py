@@ -8,7 +8,7 @@ import logging
 from pathlib import Path
 from typing import Any
 
-from smart_agriculture import config, dataset_sync, inventory
+from smart_agriculture import audit, config, dashboards, dataset_sync, inventory, watch
 from smart_agriculture.pipelines import gcs_utils
 
 
@@ -30,14 +30,12 @@ def generate_insight(config_data: dict[str, Any]) -> str:
     return base
 
 
-def process_insight(input_dir: str, out_dir: str) -> None:
-    """Process the insight data."""
+def process_insight(input_dir: str, out_dir: str, workers: int = audit.DEFAULT_WORKERS) -> None:
+    """Write the hashed file listing for the input data."""
     input_path = Path(input_dir)
     output_path = Path(out_dir)
     output_path.mkdir(exist_ok=True)
-    with open(output_path / "file_list.txt", "w") as f:
-        for file_path in input_path.glob("**/*"):
-            f.write(f"{file_path.name}\n")
+    audit.build_file_listing(input_path, output_path / audit.LISTING_FILENAME, workers=workers)
     logging.info(f"Processed data from {input_dir} and saved results to {out_dir}")
 
 
@@ -50,11 +48,37 @@ def main() -> None:
     parser_insight = subparsers.add_parser("insight", help="Generate a placeholder insight.")
     parser_insight.add_argument("--input_dir", default=config.DATA_DIR, help="Input directory for insight generation.")
     parser_insight.add_argument("--out_dir", default=config.OUT_DIR, help="Output directory for insight generation.")
+    parser_insight.add_argument(
+        "--workers",
+        type=int,
+        default=audit.DEFAULT_WORKERS,
+        help="Threads used to checksum files (default: %(default)s).",
+    )
 
     parser_upload = subparsers.add_parser("upload", help="Upload a directory to GCS.")
     parser_upload.add_argument("source_directory", nargs="?", default=config.OUT_DIR, help="Local directory to upload.")
     parser_upload.add_argument("destination_blob_prefix", help="GCS destination blob prefix.")
 
+    parser_dash = subparsers.add_parser(
+        "upload-dashboards",
+        help="Upload dashboard partitions changed since the last upload.",
+    )
+    parser_dash.add_argument(
+        "--dash-dir",
+        default=config.DASH_DIR,
+        help="Override the dashboard directory (default: %(default)s).",
+    )
+    parser_dash.add_argument(
+        "--name",
+        default=dashboards.DEFAULT_VIEW_NAME,
+        help="Dashboard view to upload (default: %(default)s).",
+    )
+    parser_dash.add_argument(
+        "--destination-prefix",
+        default=dashboards.DEFAULT_DESTINATION_PREFIX,
+        help="Override the GCS prefix (default: %(default)s).",
+    )
+
     parser_sync = subparsers.add_parser(
         "sync-data",
         help="Sync the tomato leaf dataset to the configured Cloud Storage bucket.",
@@ -90,15 +114,72 @@ def main() -> None:
         help="Override the output directory (default: %(default)s).",
     )
 
+    parser_watch = subparsers.add_parser(
+        "watch",
+        help="Watch the data directory and export newly landed cubes incrementally.",
+    )
+    parser_watch.add_argument(
+        "--data-dir",
+        default=config.DATA_DIR,
+        help="Override the watched directory (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--out-dir",
+        default=config.OUT_DIR,
+        help="Override the output directory (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--interval",
+        type=float,
+        default=watch.DEFAULT_POLL_INTERVAL,
+        help="Seconds between directory scans (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--settle",
+        type=float,
+        default=watch.DEFAULT_SETTLE_SECONDS,
+        help="Seconds a .hdr/.bil pair must stay unchanged before processing (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--workers",
+        type=int,
+        default=watch.DEFAULT_WORKERS,
+        help="Number of export workers (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--queue-size",
+        type=int,
+        default=watch.DEFAULT_QUEUE_SIZE,
+        help="Maximum samples waiting for a worker (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--max-attempts",
+        type=int,
+        default=watch.DEFAULT_MAX_ATTEMPTS,
+        help="Failed exports of a cube before it is skipped until rewritten (default: %(default)s).",
+    )
+    parser_watch.add_argument(
+        "--once",
+        action="store_true",
+        help="Process cubes that have already settled, then exit.",
+    )
+
     args = parser.parse_args()
 
     try:
         if args.command == "insight":
-            process_insight(args.input_dir, args.out_dir)
+            process_insight(args.input_dir, args.out_dir, workers=args.workers)
         elif args.command == "upload":
             gcs_utils.upload_files(
                 config.GCS_BUCKET, args.source_directory, args.destination_blob_prefix
             )
+        elif args.command == "upload-dashboards":
+            dashboards.upload_changed(
+                config.GCS_BUCKET,
+                dash_dir=args.dash_dir,
+                name=args.name,
+                destination_blob_prefix=args.destination_prefix,
+            )
         elif args.command == "sync-data":
             dataset_sync.sync_tomato_leaf_dataset(
                 dataset_dir=args.dataset_dir,
@@ -107,6 +188,17 @@ def main() -> None:
             )
         elif args.command == "parse-inventory":
             inventory.parse_inventory(data_dir=args.data_dir, out_dir=args.out_dir)
+        elif args.command == "watch":
+            watch.watch(
+                args.data_dir,
+                args.out_dir,
+                poll_interval=args.interval,
+                settle_seconds=args.settle,
+                workers=args.workers,
+                queue_size=args.queue_size,
+                max_attempts=args.max_attempts,
+                once=args.once,
+            )
         else:
             parser.print_help()
     except Exception as e:
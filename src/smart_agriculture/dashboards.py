@@ -0,0 +1,229 @@
+"""
+Partitioned, append-only dashboard exports for Looker.
+
+Rows land under ``{dash_dir}/{name}/timepoint=<tp>/run_date=<YYYY-MM-DD>/part.<parquet|csv>``.
+A ``_manifest.json`` next to the partitions records a digest per (sample_id, model_version) row so
+reruns only touch partitions whose rows are new or changed, and lists the partitions not yet uploaded.
+
+Partitions are staged as ``part.<fmt>.tmp`` and only moved into place once the manifest naming them
+is saved; a run that crashes part-way is rolled forward (or its orphaned temps discarded) next time.
+
+Parquet is used when pyarrow is installed; otherwise partitions fall back to CSV.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from smart_agriculture import config
+from smart_agriculture.pipelines import gcs_utils
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_VIEW_NAME = "bls_lab_view"
+DEFAULT_DESTINATION_PREFIX = "dashboards"
+MANIFEST_FILENAME = "_manifest.json"
+KEY_COLUMNS = ["sample_id", "model_version"]
+FORMATS = ("parquet", "csv")
+_STRING_COLUMNS = {"sample_id": str, "model_version": str, "timepoint": str}
+
+
+def default_format() -> str:
+    """Return ``parquet`` when a parquet engine is available, else ``csv``."""
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "csv"
+
+
+def _row_key(sample_id: Any, model_version: Any) -> str:
+    return f"{sample_id}|{model_version}"
+
+
+def _row_digest(row: Dict[str, Any]) -> str:
+    payload = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(view_dir: Path) -> Dict[str, Any]:
+    path = view_dir / MANIFEST_FILENAME
+    if not path.exists():
+        return {"format": None, "rows": {}, "partitions": {}, "pending_upload": [], "staged": []}
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _save_manifest(view_dir: Path, manifest: Dict[str, Any]) -> None:
+    path = view_dir / MANIFEST_FILENAME
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def _staged_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+def _commit_staged(view_dir: Path, manifest: Dict[str, Any]) -> None:
+    """Move staged partitions named by a saved manifest into place and drop any orphaned temps."""
+    staged = set(manifest.get("staged", []))
+    for partition in staged:
+        tmp_path = _staged_path(view_dir / partition)
+        if tmp_path.exists():
+            os.replace(tmp_path, view_dir / partition)
+    for tmp_path in view_dir.glob("timepoint=*/run_date=*/part.*.tmp"):
+        tmp_path.unlink()  # staged by a run that crashed before its manifest was saved
+    manifest["staged"] = []
+
+
+def _read_partition(path: Path, fmt: str) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame()
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=_STRING_COLUMNS)
+
+
+def _write_partition(df: pd.DataFrame, path: Path, fmt: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def write_dashboard(
+    df: pd.DataFrame,
+    model_version: str,
+    *,
+    dash_dir: Path = config.DASH_DIR,
+    name: str = DEFAULT_VIEW_NAME,
+    run_date: Optional[str] = None,
+    fmt: Optional[str] = None,
+) -> List[str]:
+    """
+    Append new or changed sample rows to timepoint/run-date partitions.
+
+    Rows are keyed by ``sample_id`` and ``model_version``; a rerun with identical rows writes nothing.
+    A changed row is dropped from the partition that held it and appended to the current run's
+    partition, so each key appears exactly once across the view.
+
+    Returns the partition paths (relative to the view directory) rewritten by this call.
+    """
+    view_dir = Path(dash_dir) / name
+    view_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(view_dir)
+    if manifest.get("staged") or any(view_dir.glob("timepoint=*/run_date=*/part.*.tmp")):
+        _commit_staged(view_dir, manifest)
+        _save_manifest(view_dir, manifest)
+
+    fmt = fmt or manifest["format"] or default_format()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported dashboard format {fmt!r}; expected one of {FORMATS}")
+    if manifest["format"] and manifest["format"] != fmt:
+        raise ValueError(f"Dashboard {name} is stored as {manifest['format']}, not {fmt}")
+    manifest["format"] = fmt
+    run_date = run_date or datetime.now(timezone.utc).date().isoformat()
+
+    rows = df.copy()
+    if "model_version" not in rows.columns:
+        rows["model_version"] = model_version
+    rows = rows.astype({column: str for column in _STRING_COLUMNS if column in rows.columns})
+    rows = rows.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+
+    additions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    removals: Dict[str, set] = defaultdict(set)
+    for record in rows.to_dict(orient="records"):
+        key = _row_key(record["sample_id"], record["model_version"])
+        digest = _row_digest(record)
+        previous = manifest["rows"].get(key)
+        if previous is not None and previous["digest"] == digest:
+            continue
+
+        partition = f"timepoint={record['timepoint']}/run_date={run_date}/part.{fmt}"
+        if previous is not None:
+            removals[previous["partition"]].add(key)
+        additions[partition].append(record)
+        manifest["rows"][key] = {"digest": digest, "partition": partition}
+
+    touched = sorted(set(additions) | set(removals))
+    for partition in touched:
+        path = view_dir / partition
+        current = _read_partition(path, fmt)
+        if not current.empty and removals.get(partition):
+            keys = current["sample_id"].astype(str) + "|" + current["model_version"].astype(str)
+            current = current[~keys.isin(removals[partition])]
+        frames = [frame for frame in (current, pd.DataFrame(additions.get(partition, []))) if not frame.empty]
+        merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=rows.columns)
+        merged = merged.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+
+        # Emptied partitions are written out rather than deleted so the next upload overwrites them.
+        staged_path = _staged_path(path)
+        _write_partition(merged, staged_path, fmt)
+        manifest["partitions"][partition] = {
+            "rows": int(len(merged.index)),
+            "sha256": _file_digest(staged_path),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    manifest["pending_upload"] = sorted(set(manifest["pending_upload"]) | set(touched))
+    manifest["staged"] = touched
+    _save_manifest(view_dir, manifest)
+    _commit_staged(view_dir, manifest)
+    _save_manifest(view_dir, manifest)
+
+    LOGGER.info("Dashboard %s: %d partitions updated (%s)", name, len(touched), fmt)
+    return touched
+
+
+def upload_changed(
+    bucket_name: Optional[str] = None,
+    *,
+    dash_dir: Path = config.DASH_DIR,
+    name: str = DEFAULT_VIEW_NAME,
+    destination_blob_prefix: str = DEFAULT_DESTINATION_PREFIX,
+) -> List[str]:
+    """
+    Upload the partitions written since the last upload, clear the pending list, then upload the manifest.
+
+    The pending list is only cleared once every partition is uploaded, so a run killed part-way
+    retries the same partitions; the manifest goes last so the published copy shows nothing pending.
+    """
+    view_dir = Path(dash_dir) / name
+    manifest = _load_manifest(view_dir)
+    pending = list(manifest["pending_upload"])
+    if not pending:
+        LOGGER.info("Dashboard %s has no partitions pending upload.", name)
+        return []
+
+    bucket_name = bucket_name or config.GCS_BUCKET
+    destination = f"{destination_blob_prefix}/{name}"
+    gcs_utils.upload_files(bucket_name, str(view_dir), destination, relative_paths=pending)
+
+    manifest["pending_upload"] = []
+    _save_manifest(view_dir, manifest)
+    try:
+        gcs_utils.upload_files(bucket_name, str(view_dir), destination, relative_paths=[MANIFEST_FILENAME])
+    except Exception:
+        # Keep the partitions pending so the next run republishes a manifest that matches them.
+        manifest["pending_upload"] = pending
+        _save_manifest(view_dir, manifest)
+        raise
+
+    return pending
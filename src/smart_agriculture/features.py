@@ -1,5 +1,6 @@
 
 import numpy as np
+from scipy.signal import savgol_filter
 
 def pick_band_idx(wavelengths_nm, target_nm):
     """
@@ -28,3 +29,219 @@ def ndwi(nir, swir):
     IEC 62304: This function is a modular and reusable component.
     """
     return (nir - swir) / (nir + swir)
+
+
+# --- Batched feature bank -------------------------------------------------
+# The functions below take a samples x bands matrix and a shared wavelength axis and
+# work on every spectrum at once, so thousands of spectra cost a handful of numpy calls.
+
+RED_EDGE_WINDOW_NM = (680.0, 750.0)
+
+# Absorption features: name -> (start nm, end nm) of the continuum-removal window.
+DEFAULT_ABSORPTION_WINDOWS = {
+    "chl_670": (550.0, 750.0),
+    "water_970": (920.0, 1060.0),
+    "water_1200": (1100.0, 1280.0),
+}
+
+
+def _as_matrix(spectra):
+    """Return spectra as a float (samples, bands) array; a single spectrum becomes one row."""
+    return np.atleast_2d(np.asarray(spectra, dtype=float))
+
+
+def _interpolate_nonfinite(spectra, wavelengths_nm):
+    """Fill NaN/inf bands by linear interpolation along wavelength; rows with < 2 finite bands become all NaN."""
+    finite = np.isfinite(spectra)
+    gappy = np.nonzero(~finite.all(axis=1))[0]
+    if not gappy.size:
+        return spectra
+    filled = spectra.copy()
+    for i in gappy:  # only rows with gaps pay for the Python loop
+        ok = finite[i]
+        if ok.sum() < 2:
+            filled[i] = np.nan
+        else:
+            filled[i, ~ok] = np.interp(wavelengths_nm[~ok], wavelengths_nm[ok], spectra[i, ok])
+    return filled
+
+
+def savgol_derivative(spectra, wavelengths_nm, window_length=11, polyorder=2, deriv=1):
+    """
+    Computes Savitzky-Golay smoothed derivatives along the band axis for every spectrum.
+
+    The band spacing is taken as the mean wavelength step, which matches the evenly sampled
+    VISNIR/SWIR cubes. Derivatives are per nanometre. Non-finite bands are interpolated from
+    their neighbours first; rows with fewer than two finite bands come back as NaN.
+    IEC 62304: This function is a modular and reusable component.
+    """
+    spectra = _as_matrix(spectra)
+    wavelengths_nm = np.asarray(wavelengths_nm, dtype=float)
+    n_bands = spectra.shape[1]
+
+    window_length = min(window_length, n_bands if n_bands % 2 else n_bands - 1)
+    if window_length <= polyorder:
+        raise ValueError(f"Need more than {polyorder} bands for a degree-{polyorder} Savitzky-Golay fit")
+
+    delta = float(np.mean(np.diff(wavelengths_nm))) if n_bands > 1 else 1.0
+    filled = _interpolate_nonfinite(spectra, wavelengths_nm)
+    usable = np.isfinite(filled).all(axis=1)
+    if usable.all():
+        return savgol_filter(filled, window_length, polyorder, deriv=deriv, delta=delta, axis=1)
+
+    derivative = np.full(spectra.shape, np.nan)
+    if usable.any():
+        derivative[usable] = savgol_filter(filled[usable], window_length, polyorder, deriv=deriv, delta=delta, axis=1)
+    return derivative
+
+
+def red_edge_position(spectra, wavelengths_nm, window_nm=RED_EDGE_WINDOW_NM, first_derivative=None):
+    """
+    Finds the red-edge position (wavelength of the steepest reflectance rise) for every spectrum.
+
+    Uses the maximum of the first derivative inside ``window_nm``, refined by a parabola through
+    the peak and its neighbours. Returns NaN when the window is outside the sensor range, and
+    per row when the derivative is not finite across the window.
+    IEC 62304: This function is a modular and reusable component.
+    """
+    spectra = _as_matrix(spectra)
+    wavelengths_nm = np.asarray(wavelengths_nm, dtype=float)
+    if first_derivative is None:
+        first_derivative = savgol_derivative(spectra, wavelengths_nm)
+
+    in_window = np.nonzero((wavelengths_nm >= window_nm[0]) & (wavelengths_nm <= window_nm[1]))[0]
+    if in_window.size < 3:
+        return np.full(spectra.shape[0], np.nan)
+
+    d1 = first_derivative[:, in_window]
+    wl = wavelengths_nm[in_window]
+    peak = np.clip(np.argmax(d1, axis=1), 1, in_window.size - 2)
+    rows = np.arange(d1.shape[0])
+
+    left, mid, right = d1[rows, peak - 1], d1[rows, peak], d1[rows, peak + 1]
+    curvature = left - 2 * mid + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(curvature < 0, 0.5 * (left - right) / curvature, 0.0)
+    offset = np.clip(offset, -1.0, 1.0)
+
+    step = np.where(offset >= 0, wl[peak + 1] - wl[peak], wl[peak] - wl[peak - 1])
+    return np.where(np.isfinite(d1).all(axis=1), wl[peak] + offset * step, np.nan)
+
+
+def upper_hull_mask(spectra, wavelengths_nm):
+    """
+    Marks the bands that lie on each spectrum's upper convex hull.
+
+    Runs Andrew's monotone chain over the bands once, with the per-sample stacks held in one
+    array, so the Python loop is over bands rather than samples. Non-finite bands are skipped,
+    so they are never hull vertices and the hull bridges the gap between their finite neighbours.
+    IEC 62304: This function is a modular and reusable component.
+    """
+    spectra = _as_matrix(spectra)
+    x = np.asarray(wavelengths_nm, dtype=float)
+    n_samples, n_bands = spectra.shape
+    finite = np.isfinite(spectra)
+
+    stack = np.zeros((n_samples, n_bands), dtype=np.intp)
+    top = np.zeros(n_samples, dtype=np.intp)
+    all_rows = np.arange(n_samples)
+    for j in range(n_bands):
+        pushing = all_rows[finite[:, j]]
+        # Only rows that popped on the previous pass can pop again for this band.
+        rows = pushing
+        while rows.size:
+            rows = rows[top[rows] >= 2]
+            a = stack[rows, top[rows] - 2]
+            b = stack[rows, top[rows] - 1]
+            ya, yb, yj = spectra[rows, a], spectra[rows, b], spectra[rows, j]
+            # b is on or below the chord a -> j, so it cannot be an upper-hull vertex.
+            rows = rows[(x[b] - x[a]) * (yj - ya) - (yb - ya) * (x[j] - x[a]) >= 0]
+            top[rows] -= 1
+        stack[pushing, top[pushing]] = j
+        top[pushing] += 1
+
+    mask = np.zeros((n_samples, n_bands), dtype=bool)
+    depth = np.arange(n_bands)[None, :] < top[:, None]
+    mask[np.nonzero(depth)[0], stack[depth]] = True
+    return mask
+
+
+def continuum_removed(spectra, wavelengths_nm):
+    """
+    Divides every spectrum by its convex-hull continuum (1.0 on the hull, < 1.0 in absorptions).
+    IEC 62304: This function is a modular and reusable component.
+    """
+    spectra = _as_matrix(spectra)
+    x = np.asarray(wavelengths_nm, dtype=float)
+    n_bands = spectra.shape[1]
+    mask = upper_hull_mask(spectra, x)
+
+    # For each band, the nearest hull vertex at or before it and at or after it.
+    band_idx = np.arange(n_bands)
+    left = np.maximum.accumulate(np.where(mask, band_idx, 0), axis=1)
+    right = np.minimum.accumulate(np.where(mask, band_idx, n_bands - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    rows = np.arange(spectra.shape[0])[:, None]
+    y_left, y_right = spectra[rows, left], spectra[rows, right]
+    span = x[right] - x[left]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(span > 0, (x[None, :] - x[left]) / span, 0.0)
+        continuum = y_left + t * (y_right - y_left)
+        return np.where(continuum > 0, spectra / continuum, np.nan)
+
+
+def band_depth_area(spectra, wavelengths_nm, window_nm):
+    """
+    Measures an absorption feature inside ``window_nm`` after removing the local continuum.
+
+    Returns ``(depth, area, center_nm)`` arrays: the maximum of ``1 - CR``, its integral over
+    wavelength, and the wavelength where the depth peaks. NaN when the window is out of range,
+    and per row for degenerate spectra (e.g. all zeros) so one bad row does not fail the batch.
+    IEC 62304: This function is a modular and reusable component.
+    """
+    spectra = _as_matrix(spectra)
+    wavelengths_nm = np.asarray(wavelengths_nm, dtype=float)
+    in_window = np.nonzero((wavelengths_nm >= window_nm[0]) & (wavelengths_nm <= window_nm[1]))[0]
+    if in_window.size < 3:
+        empty = np.full(spectra.shape[0], np.nan)
+        return empty, empty.copy(), empty.copy()
+
+    wl = wavelengths_nm[in_window]
+    absorption = 1.0 - continuum_removed(spectra[:, in_window], wl)
+
+    depth, area, center_nm = (np.full(spectra.shape[0], np.nan) for _ in range(3))
+    # Rows without a positive continuum (e.g. all-zero padding) are all NaN; leave them NaN.
+    valid = ~np.all(np.isnan(absorption), axis=1)
+    if valid.any():
+        absorption = absorption[valid]
+        depth[valid] = np.nanmax(absorption, axis=1)
+        area[valid] = np.nansum(0.5 * (absorption[:, 1:] + absorption[:, :-1]) * np.diff(wl), axis=1)
+        center_nm[valid] = wl[np.nanargmax(absorption, axis=1)]
+    return depth, area, center_nm
+
+
+def feature_bank(spectra, wavelengths_nm, windows=None, window_length=11, polyorder=2):
+    """
+    Computes the spectral feature bank for a samples x bands matrix in one vectorized pass.
+
+    Returns a dict of per-sample arrays (``pd.DataFrame(feature_bank(...))`` gives one row per
+    spectrum): red-edge position and slope, plus depth/area/center for each absorption window.
+    IEC 62304: This function is a modular and reusable component.
+    """
+    spectra = _as_matrix(spectra)
+    wavelengths_nm = np.asarray(wavelengths_nm, dtype=float)
+    windows = DEFAULT_ABSORPTION_WINDOWS if windows is None else windows
+
+    d1 = savgol_derivative(spectra, wavelengths_nm, window_length=window_length, polyorder=polyorder)
+    bank = {"rep_nm": red_edge_position(spectra, wavelengths_nm, first_derivative=d1)}
+
+    in_red_edge = (wavelengths_nm >= RED_EDGE_WINDOW_NM[0]) & (wavelengths_nm <= RED_EDGE_WINDOW_NM[1])
+    bank["red_edge_slope"] = d1[:, in_red_edge].max(axis=1) if in_red_edge.any() else np.full(spectra.shape[0], np.nan)
+
+    for name, window_nm in windows.items():
+        depth, area, center_nm = band_depth_area(spectra, wavelengths_nm, window_nm)
+        bank[f"{name}_depth"] = depth
+        bank[f"{name}_area"] = area
+        bank[f"{name}_center_nm"] = center_nm
+
+    return bank
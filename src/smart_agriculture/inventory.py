@@ -2,7 +2,7 @@
 import logging
 import re
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 import pandas as pd
 
@@ -21,6 +21,7 @@ if not logging.getLogger().handlers:
     )
 
 LOGGER = logging.getLogger(__name__)
+INVENTORY_COLUMNS = ["hdr_path", "sensor", "is_ref", "timepoint"]
 
 
 def _determine_timepoint(filename: str) -> str:
@@ -37,6 +38,24 @@ def _determine_timepoint(filename: str) -> str:
     return "before"
 
 
+def describe_hdr(hdr_path: Path) -> Dict[str, Any]:
+    """
+    Build the inventory record for a single ENVI header.
+    """
+    filename = hdr_path.name
+
+    sensor = "VISNIR" if "VISNIR" in filename else "SWIR"
+    is_ref = "cloth" in filename
+    timepoint = _determine_timepoint(filename)
+
+    return {
+        "hdr_path": str(hdr_path),
+        "sensor": sensor,
+        "is_ref": is_ref,
+        "timepoint": timepoint,
+    }
+
+
 def parse_inventory(data_dir: Path = RAW_DATA_DIR, out_dir: Path = PROCESSED_DIR) -> Path:
     """
     Parse the hyperspectral inventory and persist metadata for auditing.
@@ -57,24 +76,9 @@ def parse_inventory(data_dir: Path = RAW_DATA_DIR, out_dir: Path = PROCESSED_DIR
     if not hdr_files:
         LOGGER.warning("No .hdr files discovered under %s", data_dir)
 
-    metadata: List[Dict[str, Any]] = []
-    for hdr_path in hdr_files:
-        filename = hdr_path.name
-
-        sensor = "VISNIR" if "VISNIR" in filename else "SWIR"
-        is_ref = "cloth" in filename
-        timepoint = _determine_timepoint(filename)
-
-        metadata.append(
-            {
-                "hdr_path": str(hdr_path),
-                "sensor": sensor,
-                "is_ref": is_ref,
-                "timepoint": timepoint,
-            }
-        )
+    metadata: List[Dict[str, Any]] = [describe_hdr(hdr_path) for hdr_path in hdr_files]
 
-    df = pd.DataFrame(metadata)
+    df = pd.DataFrame(metadata, columns=INVENTORY_COLUMNS)
     csv_path = out_dir / "hsi_meta.csv"
     df.to_csv(csv_path, index=False)
 
@@ -82,3 +86,33 @@ def parse_inventory(data_dir: Path = RAW_DATA_DIR, out_dir: Path = PROCESSED_DIR
     print(f"Successfully generated {csv_path}")
 
     return csv_path
+
+
+def append_inventory(hdr_paths: Iterable[Path], out_dir: Path = PROCESSED_DIR) -> pd.DataFrame:
+    """
+    Add headers missing from ``hsi_meta.csv`` without rewriting existing records.
+
+    Returns the full inventory after the append so callers can resolve references against it.
+    An empty or header-less ``hsi_meta.csv`` is treated as an empty inventory.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    csv_path = out_dir / "hsi_meta.csv"
+
+    try:
+        existing = pd.read_csv(csv_path)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        existing = pd.DataFrame()
+    has_header = "hdr_path" in existing.columns
+    if not has_header:
+        existing = pd.DataFrame(columns=INVENTORY_COLUMNS)
+
+    known = set(existing["hdr_path"].astype(str))
+    new_rows = [describe_hdr(Path(p)) for p in hdr_paths if str(p) not in known]
+    if not new_rows:
+        return existing
+
+    new_df = pd.DataFrame(new_rows, columns=INVENTORY_COLUMNS)
+    new_df.to_csv(csv_path, mode="a" if has_header else "w", header=not has_header, index=False)
+    LOGGER.info("Appended %d records to %s", len(new_df.index), csv_path)
+
+    return pd.concat([existing, new_df], ignore_index=True) if not existing.empty else new_df
@@ -1,17 +1,25 @@
 from google.cloud import storage
 import os
 import logging
+from typing import Iterable, Optional
 
 LOGGER = logging.getLogger(__name__)
 
-def upload_files(bucket_name: str, source_directory: str, destination_blob_prefix: str) -> None:
+def upload_files(
+    bucket_name: str,
+    source_directory: str,
+    destination_blob_prefix: str,
+    relative_paths: Optional[Iterable[str]] = None,
+) -> None:
     """Uploads all files in a directory to the bucket.
 
     Args:
         bucket_name: The name of the GCS bucket.
         source_directory: The local directory to upload.
         destination_blob_prefix: The GCS destination blob prefix.
+        relative_paths: Optional paths relative to source_directory; when given, only these are uploaded.
     """
+    selected = None if relative_paths is None else {os.path.normpath(p) for p in relative_paths}
     try:
         storage_client = storage.Client()
         bucket = storage_client.bucket(bucket_name)
@@ -20,6 +28,8 @@ def upload_files(bucket_name: str, source_directory: str, destination_blob_prefi
             for filename in filenames:
                 local_path = os.path.join(dirpath, filename)
                 relative_path = os.path.relpath(local_path, source_directory)
+                if selected is not None and relative_path not in selected:
+                    continue
                 blob_path = os.path.join(destination_blob_prefix, relative_path)
                 
                 blob = bucket.blob(blob_path)
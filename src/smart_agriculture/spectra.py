@@ -0,0 +1,89 @@
+"""
+Per-sample spectrum export shared by ``scripts/export_spectra.py`` and the watch daemon.
+
+Outputs:
+  {out_dir}/{stem}_spectrum.csv  -> band_idx, wavelength_nm, refl_norm, sensor, timepoint, ref_file
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import spectral as spy
+
+SPECTRUM_COLUMNS = ["band_idx", "wavelength_nm", "refl_norm", "sensor", "timepoint", "ref_file"]
+
+
+def load_cube(hdr_path: str):
+    """Load ENVI cube and wavelengths."""
+    img = spy.open_image(hdr_path)
+    cube = img.load()
+    try:
+        wl = np.array(list(map(float, img.metadata.get("wavelength", []))))
+        if wl.size != cube.shape[-1]:
+            wl = np.arange(cube.shape[-1], dtype=float)
+    except Exception:
+        wl = np.arange(cube.shape[-1], dtype=float)
+    return cube, wl
+
+
+def mean_spectrum(cube: np.ndarray) -> np.ndarray:
+    """Compute mean reflectance across spatial dimensions."""
+    return np.nanmean(cube, axis=(0, 1))
+
+
+def pick_ref(df: pd.DataFrame, row: pd.Series) -> Optional[str]:
+    """Pick matching cloth reference (same sensor/timepoint) or fallback to any cloth."""
+    same_tp = df[(df["sensor"] == row["sensor"]) & (df["timepoint"] == row["timepoint"]) & (df["is_ref"] == 1)]
+    if not same_tp.empty:
+        return same_tp.iloc[0]["hdr_path"]
+    any_cloth = df[(df["sensor"] == row["sensor"]) & (df["is_ref"] == 1)]
+    if not any_cloth.empty:
+        return any_cloth.iloc[0]["hdr_path"]
+    return None
+
+
+def normalize(sample_spec: np.ndarray, ref_spec: Optional[np.ndarray]) -> np.ndarray:
+    """Normalize reflectance by cloth reference."""
+    if ref_spec is None:
+        # fallback: return clipped raw reflectance
+        return np.clip(sample_spec, 0, np.percentile(sample_spec, 99.9))
+    eps = 1e-9
+    return np.clip(sample_spec / np.maximum(ref_spec, eps), 0, 2.0)
+
+
+def spectrum_path(hdr_path: str, out_dir: Path) -> Path:
+    """Return the CSV path a sample's normalized spectrum is written to."""
+    return Path(out_dir) / f"{Path(hdr_path).stem}_spectrum.csv"
+
+
+def export_sample(meta: pd.DataFrame, row: pd.Series, out_dir: Path) -> Tuple[Path, Optional[str], np.ndarray, np.ndarray]:
+    """
+    Normalize one inventory row against its cloth reference and write the spectrum CSV.
+
+    Returns the output path, the reference header used (or None) and the wavelength/reflectance arrays.
+    """
+    hdr_path = row["hdr_path"]
+    cube_s, wl = load_cube(hdr_path)
+    spec_s = mean_spectrum(cube_s)
+
+    ref_hdr = pick_ref(meta, row)
+    spec_ref = None
+    if ref_hdr:
+        cube_r, _ = load_cube(ref_hdr)
+        spec_ref = mean_spectrum(cube_r)
+
+    spec_n = normalize(spec_s, spec_ref)
+
+    out = spectrum_path(hdr_path, out_dir)
+    with out.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(SPECTRUM_COLUMNS)
+        for i, (wav, val) in enumerate(zip(wl, spec_n)):
+            w.writerow([i, float(wav), float(val), row["sensor"], row["timepoint"], ref_hdr or "NONE"])
+
+    return out, ref_hdr, wl, spec_n
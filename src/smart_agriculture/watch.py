@@ -0,0 +1,522 @@
+"""
+Watch mode: incrementally inventory and export hyperspectral cubes as they land.
+
+The scanning station drops ``.hdr``/``.bil`` pairs into ``config.DATA_DIR``. The watcher polls the
+tree with ``os.scandir``, waits until both halves of a pair have stopped changing, appends only the
+new headers to ``hsi_meta.csv`` and hands samples to a bounded queue drained by a worker pool that
+writes the normalized spectrum and its vegetation indices.
+
+Outputs:
+  {out_dir}/{stem}_spectrum.csv   -> same layout as scripts/export_spectra.py
+  {out_dir}/watch_features.csv    -> hdr_path, sensor, timepoint, ref_file, ndvi, pri, ndwi (one row per cube)
+  {out_dir}/watch_state.json      -> processed/failed ledger so restarts do not reprocess cubes
+  reports/watch_latency.csv       -> hdr_file, landed_at, exported_at, latency_s (one row per landing)
+
+Both CSVs are rewritten atomically keyed by cube (and landing time for latency), so re-exports
+against a later reference, or a rerun after a crash before the ledger was saved, never duplicate rows.
+Re-exports of an already exported landing do not add latency rows.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from smart_agriculture import config, features, inventory, spectra
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_SETTLE_SECONDS = 5.0
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_MAX_ATTEMPTS = 3
+
+STATE_FILENAME = "watch_state.json"
+FEATURES_FILENAME = "watch_features.csv"
+LATENCY_FILENAME = "watch_latency.csv"
+
+FEATURE_COLUMNS = ["hdr_path", "sensor", "timepoint", "ref_file", "ndvi", "pri", "ndwi"]
+FEATURE_KEY = ["hdr_path"]
+LATENCY_COLUMNS = ["hdr_file", "landed_at", "exported_at", "latency_s"]
+LATENCY_KEY = ["hdr_file", "landed_at"]
+
+# Index name -> (numerator band nm, denominator band nm, index function)
+INDEX_BANDS = {
+    "ndvi": (800.0, 670.0, features.ndvi),
+    "pri": (531.0, 570.0, features.pri),
+    "ndwi": (860.0, 1240.0, features.ndwi),
+}
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class CubePair:
+    """A header/raster pair observed on disk."""
+
+    hdr_path: Path
+    bil_path: Path
+    signature: Tuple[int, int, int, int]  # (hdr size, hdr mtime_ns, bil size, bil mtime_ns)
+
+    @property
+    def landed_at(self) -> float:
+        """Epoch seconds of the most recent write to either half of the pair."""
+        return max(self.signature[1], self.signature[3]) / 1e9
+
+
+def scan_pairs(data_dir: Path) -> Dict[str, CubePair]:
+    """
+    Walk ``data_dir`` with ``os.scandir`` and return complete header/raster pairs keyed by header path.
+    """
+    headers: Dict[str, Tuple[str, os.stat_result]] = {}
+    rasters: Dict[str, Tuple[str, os.stat_result]] = {}
+
+    stack = [str(data_dir)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    stem, ext = os.path.splitext(entry.path)
+                    ext = ext.lower()
+                    if ext not in (".hdr", ".bil"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # removed between listing and stat
+                    if ext == ".hdr":
+                        if stem.lower().endswith(".bil"):
+                            stem = stem[:-4]  # ENVI also names headers "<cube>.bil.hdr"
+                        headers[stem] = (entry.path, stat)
+                    else:
+                        rasters[stem] = (entry.path, stat)
+        except FileNotFoundError:
+            continue
+
+    pairs: Dict[str, CubePair] = {}
+    for stem, (hdr_path, hdr_stat) in headers.items():
+        if stem not in rasters:
+            continue
+        bil_path, bil_stat = rasters[stem]
+        pairs[hdr_path] = CubePair(
+            hdr_path=Path(hdr_path),
+            bil_path=Path(bil_path),
+            signature=(hdr_stat.st_size, hdr_stat.st_mtime_ns, bil_stat.st_size, bil_stat.st_mtime_ns),
+        )
+    return pairs
+
+
+class PairDebouncer:
+    """
+    Release a pair only once its sizes and mtimes are unchanged across polls for ``settle_seconds``.
+    """
+
+    def __init__(self, settle_seconds: float = DEFAULT_SETTLE_SECONDS, clock: Callable[[], float] = time.time):
+        self.settle_seconds = settle_seconds
+        self._clock = clock
+        self._seen: Dict[str, Tuple[Tuple[int, int, int, int], float]] = {}
+
+    @property
+    def pending(self) -> int:
+        """Number of pairs still waiting to settle."""
+        return len(self._seen)
+
+    def update(self, pairs: Dict[str, CubePair]) -> List[CubePair]:
+        """Record the latest scan and return pairs that have settled since they were last released."""
+        now = self._clock()
+        ready: List[CubePair] = []
+
+        for key in list(self._seen):
+            if key not in pairs:
+                del self._seen[key]
+
+        for key, pair in pairs.items():
+            previous = self._seen.get(key)
+            if previous is None or previous[0] != pair.signature:
+                self._seen[key] = (pair.signature, now)
+                continue
+            if pair.signature[0] == 0 or pair.signature[2] == 0:
+                continue  # an empty half means the writer has only created the file
+            if now - previous[1] >= self.settle_seconds:
+                ready.append(pair)
+
+        return ready
+
+    def forget(self, pair: CubePair) -> None:
+        """Stop tracking a pair once it has been handed off."""
+        self._seen.pop(str(pair.hdr_path), None)
+
+
+class WatchState:
+    """
+    Ledger of processed and failed pairs persisted as JSON so restarts skip work already done.
+
+    A pair is reprocessed if its signature changes, e.g. when the station rescans a leaf. A pair
+    whose export keeps failing is given up on after ``max_attempts`` until its signature changes.
+    """
+
+    def __init__(self, path: Path, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._done: Dict[str, Dict[str, Any]] = {}
+        self._failed: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+            self._done = data.get("done", {})
+            self._failed = data.get("failed", {})
+
+    def is_done(self, pair: CubePair) -> bool:
+        with self._lock:
+            entry = self._done.get(str(pair.hdr_path))
+            return entry is not None and entry["signature"] == list(pair.signature)
+
+    def gave_up(self, pair: CubePair) -> bool:
+        """True once this exact version of the pair has failed ``max_attempts`` times."""
+        with self._lock:
+            entry = self._failed.get(str(pair.hdr_path))
+            return (
+                entry is not None
+                and entry["signature"] == list(pair.signature)
+                and entry["attempts"] >= self.max_attempts
+            )
+
+    def ref_file(self, hdr_path: str) -> Optional[str]:
+        """Reference header a done sample was normalized against (``"NONE"`` for none)."""
+        with self._lock:
+            entry = self._done.get(hdr_path)
+            return None if entry is None else entry.get("ref_file")
+
+    def done_paths(self) -> Set[str]:
+        with self._lock:
+            return set(self._done)
+
+    def mark_done(self, pair: CubePair, ref_file: Optional[str] = None) -> None:
+        with self._lock:
+            self._done[str(pair.hdr_path)] = {"signature": list(pair.signature), "ref_file": ref_file}
+            self._failed.pop(str(pair.hdr_path), None)
+            self._save()
+
+    def record_failure(self, pair: CubePair, error: str) -> int:
+        """Count a failed attempt for this version of the pair and return the attempts so far."""
+        with self._lock:
+            entry = self._failed.get(str(pair.hdr_path))
+            if entry is None or entry["signature"] != list(pair.signature):
+                entry = {"signature": list(pair.signature), "attempts": 0}
+            entry["attempts"] += 1
+            entry["error"] = error
+            self._failed[str(pair.hdr_path)] = entry
+            self._save()
+            return entry["attempts"]
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump({"done": self._done, "failed": self._failed}, handle, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)  # atomic so a crash never leaves a truncated ledger
+
+
+def spectrum_indices(wavelengths_nm: np.ndarray, refl: np.ndarray) -> Dict[str, float]:
+    """
+    Compute the vegetation indices whose bands fall inside the sensor's wavelength range.
+    """
+    values: Dict[str, float] = {}
+    lo, hi = float(np.min(wavelengths_nm)), float(np.max(wavelengths_nm))
+    for name, (band_a, band_b, func) in INDEX_BANDS.items():
+        if not (lo <= band_a <= hi and lo <= band_b <= hi):
+            values[name] = float("nan")
+            continue
+        a = refl[features.pick_band_idx(wavelengths_nm, band_a)]
+        b = refl[features.pick_band_idx(wavelengths_nm, band_b)]
+        values[name] = float(func(a, b))
+    return values
+
+
+def _load_keyed_rows(path: Path, key: List[str]) -> Dict[Tuple[str, ...], Dict[str, str]]:
+    """Read a CSV into rows keyed by ``key``; later duplicates win, missing files yield an empty dict."""
+    if not path.exists():
+        return {}
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        return {tuple(row.get(column) or "" for column in key): row for row in csv.DictReader(handle)}
+
+
+def _write_rows(path: Path, columns: List[str], rows: Dict[Tuple[str, ...], Dict[str, Any]]) -> None:
+    """Rewrite ``path`` with ``rows`` via a temp file so readers never see a partial CSV."""
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns, extrasaction="ignore", restval="")
+        writer.writeheader()
+        writer.writerows(rows.values())
+    os.replace(tmp_path, path)
+
+
+class CubeWatcher:
+    """
+    Poll ``data_dir`` and push settled cubes through inventory, export and features.
+
+    The polling thread is the only writer of ``hsi_meta.csv``; workers receive the inventory
+    snapshot taken when their sample was queued so reference lookups stay consistent. When a
+    cloth reference lands after its samples, samples whose best reference has changed are queued
+    again so they are not left on the raw-reflectance fallback.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path = config.DATA_DIR,
+        out_dir: Path = config.OUT_DIR,
+        reports_dir: Path = config.REPORTS,
+        *,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir)
+        self.reports_dir = Path(reports_dir)
+        self.poll_interval = poll_interval
+        self.workers = max(1, workers)
+        self._clock = clock
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+
+        self.debouncer = PairDebouncer(settle_seconds, clock=clock)
+        self.state = WatchState(self.out_dir / STATE_FILENAME, max_attempts=max_attempts)
+        self.latencies: List[float] = []
+
+        # Header paths queued or being exported; the debouncer re-releases them while a worker is busy.
+        self._in_flight: Set[str] = set()
+        self._in_flight_lock = threading.Lock()
+        # Sample header paths to compare against the latest references once they are idle.
+        self._recheck: Set[str] = set()
+        self._meta = inventory.append_inventory([], out_dir=self.out_dir)
+
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_size))
+        self._output_lock = threading.Lock()
+        self._feature_rows = _load_keyed_rows(self.out_dir / FEATURES_FILENAME, FEATURE_KEY)
+        self._latency_rows = _load_keyed_rows(self.reports_dir / LATENCY_FILENAME, LATENCY_KEY)
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Spawn the worker pool."""
+        for idx in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"watch-worker-{idx}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Drain the queue, stop the workers and log the latency summary."""
+        self._stop_event.set()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+        if self.latencies:
+            LOGGER.info(
+                "Watch exported %d spectra; latency median %.2fs, max %.2fs",
+                len(self.latencies),
+                float(np.median(self.latencies)),
+                max(self.latencies),
+            )
+
+    def poll_once(self) -> int:
+        """
+        Scan once, inventory newly settled pairs and enqueue their samples.
+
+        Blocks when the queue is full so a burst of landings cannot outrun the workers.
+        Returns the number of samples enqueued, including re-queues for new references.
+        """
+        if not self.data_dir.exists():
+            LOGGER.warning("Watch directory not found: %s", self.data_dir)
+            return 0
+
+        scanned = scan_pairs(self.data_dir)
+        with self._in_flight_lock:
+            in_flight = set(self._in_flight)
+        ready = [
+            pair
+            for pair in self.debouncer.update(scanned)
+            if str(pair.hdr_path) not in in_flight and not self.state.is_done(pair) and not self.state.gave_up(pair)
+        ]
+
+        enqueued = 0
+        if ready:
+            meta = inventory.append_inventory([pair.hdr_path for pair in ready], out_dir=self.out_dir)
+            self._meta = meta
+            by_path = meta.set_index(meta["hdr_path"].astype(str))
+
+            ref_sensors = set()
+            for pair in ready:
+                self.debouncer.forget(pair)
+                row = by_path.loc[str(pair.hdr_path)]
+                if bool(row["is_ref"]):
+                    # References are only inventoried; samples pick them up via spectra.pick_ref.
+                    self.state.mark_done(pair)
+                    ref_sensors.add(row["sensor"])
+                    continue
+                self._enqueue(pair, row, meta)
+                enqueued += 1
+
+            if ref_sensors:
+                self._mark_for_recheck(ref_sensors)
+            LOGGER.info("Queued %d new samples from %s", enqueued, self.data_dir)
+
+        return enqueued + self._requeue_for_new_references(scanned)
+
+    def _mark_for_recheck(self, sensors: Set[str]) -> None:
+        """Flag exported or in-flight samples of ``sensors`` whose reference may now be better."""
+        meta = self._meta
+        samples = meta[~meta["is_ref"].astype(bool) & meta["sensor"].isin(sensors)]["hdr_path"].astype(str)
+        with self._in_flight_lock:
+            candidates = self.state.done_paths() | self._in_flight
+        self._recheck |= set(samples) & candidates
+
+    def _requeue_for_new_references(self, scanned: Dict[str, CubePair]) -> int:
+        """Queue idle flagged samples whose recorded reference differs from the one picked now."""
+        if not self._recheck:
+            return 0
+        with self._in_flight_lock:
+            idle = self._recheck - self._in_flight
+
+        meta = self._meta
+        by_path = meta.set_index(meta["hdr_path"].astype(str))
+        requeued = 0
+        for hdr_path in sorted(idle):
+            self._recheck.discard(hdr_path)
+            pair = scanned.get(hdr_path)
+            if pair is None or hdr_path not in by_path.index or not self.state.is_done(pair):
+                continue
+            row = by_path.loc[hdr_path]
+            if self.state.ref_file(hdr_path) == (spectra.pick_ref(meta, row) or "NONE"):
+                continue
+            self._enqueue(pair, row, meta)
+            requeued += 1
+
+        if requeued:
+            LOGGER.info("Re-queued %d samples against newly landed references", requeued)
+        return requeued
+
+    def run(self, once: bool = False) -> None:
+        """
+        Poll until interrupted. With ``once`` the tree is sampled twice to settle, then drained.
+        """
+        self.start()
+        LOGGER.info("Watching %s every %.1fs", self.data_dir, self.poll_interval)
+        try:
+            polls = 0
+            while not self._stop_event.is_set():
+                self.poll_once()
+                polls += 1
+                if once and polls >= 2:
+                    break
+                time.sleep(self.poll_interval if not once else max(self.poll_interval, self.debouncer.settle_seconds))
+        except KeyboardInterrupt:
+            LOGGER.info("Watch interrupted; draining queue.")
+        finally:
+            self.stop()
+
+    def _enqueue(self, pair: CubePair, row: pd.Series, meta: pd.DataFrame) -> None:
+        with self._in_flight_lock:
+            self._in_flight.add(str(pair.hdr_path))
+        self._queue.put((pair, row, meta))
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            pair, row, meta = item
+            try:
+                self._process(pair, row, meta)
+            except Exception as e:
+                attempts = self.state.record_failure(pair, str(e))
+                LOGGER.error(f"Watch failed on {pair.hdr_path} (attempt {attempts}/{self.state.max_attempts}): {e}")
+                if attempts >= self.state.max_attempts:
+                    LOGGER.error(f"Giving up on {pair.hdr_path} until it is rewritten.")
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight.discard(str(pair.hdr_path))
+                self._queue.task_done()
+
+    def _process(self, pair: CubePair, row: pd.Series, meta: pd.DataFrame) -> None:
+        # Already done with this signature means a re-export against a newer reference, not a landing.
+        reexport = self.state.is_done(pair)
+        out, ref_hdr, wl, spec_n = spectra.export_sample(meta, row, self.out_dir)
+        ref_file = ref_hdr or "NONE"
+        indices = spectrum_indices(wl, spec_n)
+        exported_at = self._clock()
+        latency = exported_at - pair.landed_at
+
+        with self._output_lock:
+            feature_row = {"hdr_path": str(pair.hdr_path), "sensor": row["sensor"], "timepoint": row["timepoint"]}
+            feature_row.update(ref_file=ref_file, **indices)
+            self._feature_rows[(str(pair.hdr_path),)] = feature_row
+            _write_rows(self.out_dir / FEATURES_FILENAME, FEATURE_COLUMNS, self._feature_rows)
+            if not reexport:
+                landed_at = datetime.fromtimestamp(pair.landed_at, timezone.utc).isoformat()
+                self._latency_rows[(pair.hdr_path.name, landed_at)] = {
+                    "hdr_file": pair.hdr_path.name,
+                    "landed_at": landed_at,
+                    "exported_at": datetime.fromtimestamp(exported_at, timezone.utc).isoformat(),
+                    "latency_s": f"{latency:.3f}",
+                }
+                _write_rows(self.reports_dir / LATENCY_FILENAME, LATENCY_COLUMNS, self._latency_rows)
+                self.latencies.append(latency)
+
+        self.state.mark_done(pair, ref_file)
+        if reexport:
+            LOGGER.info("Re-exported %s against ref %s", out.name, ref_file)
+        else:
+            LOGGER.info("Exported %s (ref %s) %.2fs after landing", out.name, ref_file, latency)
+
+
+def watch(
+    data_dir: Optional[Path | str] = None,
+    out_dir: Optional[Path | str] = None,
+    *,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+    workers: int = DEFAULT_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    once: bool = False,
+) -> CubeWatcher:
+    """
+    Run the watch daemon with config defaults.
+    """
+    watcher = CubeWatcher(
+        Path(data_dir or config.DATA_DIR),
+        Path(out_dir or config.OUT_DIR),
+        poll_interval=poll_interval,
+        settle_seconds=settle_seconds,
+        workers=workers,
+        queue_size=queue_size,
+        max_attempts=max_attempts,
+    )
+    watcher.run(once=once)
+    return watcher
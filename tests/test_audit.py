@@ -0,0 +1,131 @@
+import csv
+import hashlib
+import os
+import threading
+
+import pytest
+
+from smart_agriculture import audit, cli
+
+
+def _read_listing(path):
+    with path.open(newline="", encoding="utf-8") as handle:
+        return {row["relative_path"]: row for row in csv.DictReader(handle)}
+
+
+def test_build_file_listing_records_relative_paths_and_checksums(tmp_path):
+    data_dir = tmp_path / "data"
+    (data_dir / "run1").mkdir(parents=True)
+    (data_dir / "leaf.hdr").write_text("ENVI")
+    (data_dir / "run1" / "leaf.bil").write_bytes(b"\x00" * 4096)
+    listing_path = tmp_path / "out" / audit.LISTING_FILENAME
+
+    stats = audit.build_file_listing(data_dir, listing_path, workers=2)
+
+    listing = _read_listing(listing_path)
+    assert sorted(listing) == ["leaf.hdr", "run1/leaf.bil"]
+    assert listing["run1/leaf.bil"]["size"] == "4096"
+    assert listing["run1/leaf.bil"]["sha256"] == hashlib.sha256(b"\x00" * 4096).hexdigest()
+    assert stats["files"] == 2 and stats["hashed"] == 2
+
+
+def test_build_file_listing_reuses_unchanged_checksums(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "a.bil").write_bytes(b"a")
+    (data_dir / "b.bil").write_bytes(b"b")
+    listing_path = tmp_path / audit.LISTING_FILENAME
+    audit.build_file_listing(data_dir, listing_path)
+
+    hashed = []
+    real_sha256 = audit.sha256_file
+    monkeypatch.setattr(audit, "sha256_file", lambda path: hashed.append(os.path.basename(path)) or real_sha256(path))
+    (data_dir / "b.bil").write_bytes(b"bb")
+
+    stats = audit.build_file_listing(data_dir, listing_path)
+
+    assert hashed == ["b.bil"]
+    assert stats["reused"] == 1
+    assert _read_listing(listing_path)["b.bil"]["sha256"] == hashlib.sha256(b"bb").hexdigest()
+
+
+def test_process_insight_skips_its_own_listing(tmp_path):
+    (tmp_path / "leaf.hdr").write_text("ENVI")
+
+    cli.process_insight(str(tmp_path), str(tmp_path))
+    cli.process_insight(str(tmp_path), str(tmp_path))
+
+    assert list(_read_listing(tmp_path / audit.LISTING_FILENAME)) == ["leaf.hdr"]
+
+
+def test_build_file_listing_keeps_files_it_cannot_read(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "ok.bil").write_bytes(b"ok")
+    (data_dir / "locked.bil").write_bytes(b"locked")
+    real_sha256 = audit.sha256_file
+
+    def flaky_sha256(path):
+        if path.endswith("locked.bil"):
+            raise PermissionError(13, "Permission denied", path)
+        return real_sha256(path)
+
+    monkeypatch.setattr(audit, "sha256_file", flaky_sha256)
+    listing_path = tmp_path / audit.LISTING_FILENAME
+
+    stats = audit.build_file_listing(data_dir, listing_path)
+
+    listing = _read_listing(listing_path)
+    assert sorted(listing) == ["locked.bil", "ok.bil"]
+    assert listing["locked.bil"]["sha256"] == "" and "Permission denied" in listing["locked.bil"]["error"]
+    assert listing["ok.bil"]["error"] == ""
+    assert stats["errors"] == 1 and stats["hashed"] == 1
+
+    monkeypatch.setattr(audit, "sha256_file", real_sha256)
+    stats = audit.build_file_listing(data_dir, listing_path)
+
+    assert _read_listing(listing_path)["locked.bil"]["sha256"] == hashlib.sha256(b"locked").hexdigest()
+    assert stats["hashed"] == 1 and stats["reused"] == 1
+
+
+def test_build_file_listing_keeps_hashes_when_interrupted(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for name in ("a.bil", "b.bil"):
+        (data_dir / name).write_bytes(name.encode())
+    listing_path = tmp_path / audit.LISTING_FILENAME
+    audit.build_file_listing(data_dir, listing_path)
+    (data_dir / "a.bil").write_bytes(b"a2")
+    real_walk, real_sha256 = audit.walk_files, audit.sha256_file
+    hashed = threading.Event()
+
+    def interrupted_walk(root):
+        for item in real_walk(root):
+            if item[1] == "a.bil":
+                yield item
+        hashed.wait(5)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(audit, "walk_files", interrupted_walk)
+    monkeypatch.setattr(audit, "sha256_file", lambda path: (real_sha256(path), hashed.set())[0])
+    with pytest.raises(KeyboardInterrupt):
+        audit.build_file_listing(data_dir, listing_path, workers=1)
+
+    listing = _read_listing(listing_path)
+    assert listing["a.bil"]["sha256"] == hashlib.sha256(b"a2").hexdigest()
+    assert listing["b.bil"]["sha256"] == hashlib.sha256(b"b.bil").hexdigest()  # not revisited yet, kept
+
+
+def test_walk_files_skips_directories_removed_mid_walk(tmp_path, monkeypatch):
+    (tmp_path / "gone").mkdir()
+    (tmp_path / "kept.bil").write_bytes(b"x")
+    real_scandir = os.scandir
+
+    def racing_scandir(path):
+        if path.endswith("gone"):
+            raise FileNotFoundError(2, "No such file or directory", path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(audit.os, "scandir", racing_scandir)
+
+    assert [relative for _, relative, _, _ in audit.walk_files(tmp_path)] == ["kept.bil"]
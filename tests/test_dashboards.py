@@ -0,0 +1,153 @@
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from smart_agriculture import dashboards
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["sample_id", "timepoint", "prob_infected"])
+
+
+def _read_view(view_dir):
+    parts = sorted(view_dir.rglob("part.csv"))
+    return pd.concat([pd.read_csv(p, dtype=str) for p in parts], ignore_index=True)
+
+
+def test_write_dashboard_is_idempotent_and_partitioned(tmp_path):
+    df = _frame([("s1", "D1", 0.2), ("s2", "D3", 0.9)])
+
+    first = dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="csv")
+    second = dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-02", fmt="csv")
+
+    assert first == [
+        "timepoint=D1/run_date=2026-10-01/part.csv",
+        "timepoint=D3/run_date=2026-10-01/part.csv",
+    ]
+    assert second == []
+    assert len(_read_view(tmp_path / "bls_lab_view")) == 2
+
+
+def test_write_dashboard_moves_changed_rows_and_keeps_one_per_key(tmp_path):
+    view_dir = tmp_path / "bls_lab_view"
+    dashboards.write_dashboard(
+        _frame([("s1", "D1", 0.2), ("s2", "D1", 0.4)]), "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="csv"
+    )
+
+    changed = dashboards.write_dashboard(
+        _frame([("s1", "D1", 0.7), ("s3", "D1", 0.1)]), "v1", dash_dir=tmp_path, run_date="2026-10-02", fmt="csv"
+    )
+    dashboards.write_dashboard(_frame([("s1", "D1", 0.5)]), "v2", dash_dir=tmp_path, run_date="2026-10-02", fmt="csv")
+
+    assert changed == [
+        "timepoint=D1/run_date=2026-10-01/part.csv",
+        "timepoint=D1/run_date=2026-10-02/part.csv",
+    ]
+    view = _read_view(view_dir)
+    assert sorted(zip(view["sample_id"], view["model_version"])) == [("s1", "v1"), ("s1", "v2"), ("s2", "v1"), ("s3", "v1")]
+    assert view.loc[(view["sample_id"] == "s1") & (view["model_version"] == "v1"), "prob_infected"].tolist() == ["0.7"]
+
+
+def test_upload_changed_pushes_only_pending_partitions(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        dashboards,
+        "gcs_utils",
+        SimpleNamespace(upload_files=lambda *args, **kwargs: calls.append((args, kwargs))),
+    )
+    dashboards.write_dashboard(_frame([("s1", "D1", 0.2)]), "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="csv")
+    dashboards.upload_changed("bucket", dash_dir=tmp_path)
+    dashboards.write_dashboard(_frame([("s2", "D2", 0.3)]), "v1", dash_dir=tmp_path, run_date="2026-10-02", fmt="csv")
+
+    uploaded = dashboards.upload_changed("bucket", dash_dir=tmp_path)
+
+    assert uploaded == ["timepoint=D2/run_date=2026-10-02/part.csv"]
+    target = ("bucket", str(tmp_path / "bls_lab_view"), "dashboards/bls_lab_view")
+    assert calls[-2:] == [
+        (target, {"relative_paths": ["timepoint=D2/run_date=2026-10-02/part.csv"]}),
+        (target, {"relative_paths": ["_manifest.json"]}),
+    ]
+    manifest = json.loads((tmp_path / "bls_lab_view" / "_manifest.json").read_text())
+    assert manifest["pending_upload"] == []
+    assert dashboards.upload_changed("bucket", dash_dir=tmp_path) == []
+
+
+def test_upload_changed_keeps_pending_when_partition_upload_is_killed(tmp_path, monkeypatch):
+    def killed(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(dashboards, "gcs_utils", SimpleNamespace(upload_files=killed))
+    dashboards.write_dashboard(_frame([("s1", "D1", 0.2)]), "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="csv")
+
+    with pytest.raises(KeyboardInterrupt):
+        dashboards.upload_changed("bucket", dash_dir=tmp_path)
+
+    manifest = json.loads((tmp_path / "bls_lab_view" / "_manifest.json").read_text())
+    assert manifest["pending_upload"] == ["timepoint=D1/run_date=2026-10-01/part.csv"]
+
+
+def test_write_dashboard_recovers_from_crash_before_manifest_save(tmp_path, monkeypatch):
+    df = _frame([("s1", "D1", 0.2), ("s2", "D1", 0.4)])
+    real_save = dashboards._save_manifest
+
+    def crash(view_dir, manifest):
+        raise RuntimeError("killed")
+
+    monkeypatch.setattr(dashboards, "_save_manifest", crash)
+    with pytest.raises(RuntimeError):
+        dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="csv")
+    monkeypatch.setattr(dashboards, "_save_manifest", real_save)
+
+    dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-02", fmt="csv")
+
+    view_dir = tmp_path / "bls_lab_view"
+    assert sorted(_read_view(view_dir)["sample_id"]) == ["s1", "s2"]
+    assert not list(view_dir.rglob("*.tmp"))
+
+
+def test_write_dashboard_rolls_forward_staged_partitions(tmp_path, monkeypatch):
+    df = _frame([("s1", "D1", 0.2)])
+    real_commit = dashboards._commit_staged
+    calls = []
+
+    def crash_on_first_commit(view_dir, manifest):
+        calls.append(manifest.get("staged"))
+        if len(calls) == 1:
+            raise RuntimeError("killed")
+        real_commit(view_dir, manifest)
+
+    monkeypatch.setattr(dashboards, "_commit_staged", crash_on_first_commit)
+    with pytest.raises(RuntimeError):
+        dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="csv")
+
+    assert dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-02", fmt="csv") == []
+    view = _read_view(tmp_path / "bls_lab_view")
+    assert view["sample_id"].tolist() == ["s1"]
+
+
+def test_write_dashboard_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        dashboards.write_dashboard(_frame([("s1", "D1", 0.2)]), "v1", dash_dir=tmp_path, fmt="json")
+
+    assert not list(tmp_path.rglob("part.*"))
+
+
+def test_write_dashboard_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = _frame([("s1", "D1", 0.2), ("s2", "D3", 0.9)])
+
+    first = dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="parquet")
+    df.loc[0, "prob_infected"] = 0.6
+    second = dashboards.write_dashboard(df, "v1", dash_dir=tmp_path, run_date="2026-10-01", fmt="parquet")
+
+    assert first == [
+        "timepoint=D1/run_date=2026-10-01/part.parquet",
+        "timepoint=D3/run_date=2026-10-01/part.parquet",
+    ]
+    assert second == ["timepoint=D1/run_date=2026-10-01/part.parquet"]
+    view = pd.concat(
+        [pd.read_parquet(p) for p in sorted((tmp_path / "bls_lab_view").rglob("part.parquet"))], ignore_index=True
+    )
+    assert view.sort_values("sample_id")["prob_infected"].tolist() == [0.6, 0.9]
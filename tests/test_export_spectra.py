@@ -1,10 +1,13 @@
 
+import tempfile
 import unittest
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from smart_agriculture import spectra
+
 # Make the script importable
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
@@ -26,61 +29,61 @@ class TestExportSpectra(unittest.TestCase):
 
     def test_pick_ref_matching_timepoint(self):
         """Test that the correct reference is picked when sensor and timepoint match."""
-        ref_path = export_spectra._pick_ref(self.meta_df, self.sample_row_vis)
+        ref_path = spectra.pick_ref(self.meta_df, self.sample_row_vis)
         self.assertEqual(ref_path, '/data/ref1.hdr')
 
     def test_pick_ref_fallback_sensor(self):
         """Test that a reference with the same sensor is picked when timepoint doesn't match."""
-        ref_path = export_spectra._pick_ref(self.meta_df, self.sample_row_swir)
+        ref_path = spectra.pick_ref(self.meta_df, self.sample_row_swir)
         self.assertEqual(ref_path, '/data/ref2.hdr')
 
     def test_pick_ref_no_ref(self):
         """Test that None is returned when no reference is available."""
         meta_df_no_ref = self.meta_df[self.meta_df['is_ref'] == 0]
-        ref_path = export_spectra._pick_ref(meta_df_no_ref, self.sample_row_vis)
+        ref_path = spectra.pick_ref(meta_df_no_ref, self.sample_row_vis)
         self.assertIsNone(ref_path)
 
     def test_normalize_with_ref(self):
         """Test normalization with a reference spectrum."""
         sample_spec = np.array([1.0, 2.0, 3.0])
         ref_spec = np.array([2.0, 2.0, 2.0])
-        normalized_spec = export_spectra._normalize(sample_spec, ref_spec)
+        normalized_spec = spectra.normalize(sample_spec, ref_spec)
         np.testing.assert_array_almost_equal(normalized_spec, np.array([0.5, 1.0, 1.5]))
 
     def test_normalize_no_ref(self):
         """Test normalization without a reference spectrum (fallback)."""
         sample_spec = np.array([1.0, 2.0, 100.0])
-        normalized_spec = export_spectra._normalize(sample_spec, None)
+        normalized_spec = spectra.normalize(sample_spec, None)
         # It should clip at the 99.9th percentile
         self.assertTrue(np.all(normalized_spec <= np.percentile(sample_spec, 99.9)))
 
-    @patch('pathlib.Path.exists', return_value=True)
-    @patch('pandas.read_csv')
-    @patch('export_spectra._load_cube')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('export_spectra.OUT_DIR.mkdir')
-    @patch('export_spectra.config.REPORTS.mkdir')
-    def test_main_function(self, mock_reports_mkdir, mock_out_dir_mkdir, mock_file_open, mock_load_cube, mock_read_csv, mock_path_exists):
-        # Mock Path.open to use the same mock as builtins.open
-        with patch('pathlib.Path.open', return_value=mock_file_open.return_value):
-            # Setup mocks
-            mock_read_csv.return_value = self.meta_df
-            mock_load_cube.side_effect = [
-                ((np.random.rand(10, 10, 3), np.array([400, 500, 600]))),  # sample1
-                ((np.random.rand(10, 10, 3), np.array([400, 500, 600]))),  # ref1
-                ((np.random.rand(10, 10, 3), np.array([700, 800, 900]))),  # sample2
-                ((np.random.rand(10, 10, 3), np.array([700, 800, 900])))   # ref2
-            ]
-
-            # Run the main function
-            export_spectra.main()
+    def test_main_function(self):
+        """Test that main writes one normalized spectrum per sample plus the run log."""
+        cubes = {
+            '/data/sample1.hdr': (np.full((2, 2, 3), [1.0, 2.0, 3.0]), np.array([400, 500, 600])),
+            '/data/ref1.hdr': (np.full((2, 2, 3), 2.0), np.array([400, 500, 600])),
+            '/data/sample2.hdr': (np.full((2, 2, 3), [0.5, 1.0, 1.5]), np.array([700, 800, 900])),
+            '/data/ref2.hdr': (np.full((2, 2, 3), 1.0), np.array([700, 800, 900])),
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            meta_csv = tmp / 'hsi_meta.csv'
+            self.meta_df.to_csv(meta_csv, index=False)
 
-            # Assertions
-            self.assertEqual(mock_file_open.call_count, 4) # 2 for spectra, 2 for logs
-            # Check that the output files for the samples were opened
-            mock_file_open.assert_any_call(export_spectra.OUT_DIR / 'sample1_spectrum.csv', 'w', newline='', encoding='utf-8')
-            mock_file_open.assert_any_call(export_spectra.OUT_DIR / 'sample2_spectrum.csv', 'w', newline='', encoding='utf-8')
+            with patch.object(export_spectra, 'META_CSV', meta_csv), \
+                    patch.object(export_spectra, 'OUT_DIR', tmp), \
+                    patch.object(export_spectra.config, 'REPORTS', tmp), \
+                    patch.object(spectra, 'load_cube', side_effect=lambda hdr_path: cubes[hdr_path]):
+                export_spectra.main()
 
+            sample1 = pd.read_csv(tmp / 'sample1_spectrum.csv')
+            np.testing.assert_array_almost_equal(sample1['refl_norm'], [0.5, 1.0, 1.5])
+            self.assertEqual(set(sample1['ref_file']), {'/data/ref1.hdr'})
+            sample2 = pd.read_csv(tmp / 'sample2_spectrum.csv')
+            np.testing.assert_array_almost_equal(sample2['refl_norm'], [0.5, 1.0, 1.5])
+            self.assertEqual(set(sample2['ref_file']), {'/data/ref2.hdr'})
+            run_log = pd.read_csv(tmp / 'export_spectra_run.csv')
+            self.assertEqual(list(run_log['status']), ['OK', 'OK'])
 
 if __name__ == '__main__':
     unittest.main()
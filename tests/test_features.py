@@ -0,0 +1,119 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from smart_agriculture import features
+
+WAVELENGTHS = np.linspace(400.0, 1000.0, 301)
+
+
+def _leaf_like(n_samples=4, edge_nm=715.0):
+    red_edge = 0.05 + 0.5 / (1 + np.exp(-(WAVELENGTHS - edge_nm) / 12.0))
+    water = 0.1 * np.exp(-0.5 * ((WAVELENGTHS - 970.0) / 15.0) ** 2)
+    scale = np.linspace(0.9, 1.1, n_samples)[:, None]
+    return scale * (red_edge - water)
+
+
+def test_continuum_removed_is_one_on_hull_and_below_in_absorptions():
+    spectra = _leaf_like()
+
+    cr = features.continuum_removed(spectra, WAVELENGTHS)
+
+    assert cr.shape == spectra.shape
+    assert np.all(cr <= 1.0 + 1e-12)
+    np.testing.assert_allclose(cr[:, [0, -1]], 1.0)
+    assert np.all(cr[:, np.argmin(np.abs(WAVELENGTHS - 970.0))] < 0.9)
+
+
+def _reference_upper_hull(x, y):
+    """Plain single-spectrum monotone chain, dropping collinear points and non-finite bands."""
+    hull = []
+    for j in np.nonzero(np.isfinite(y))[0]:
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            if (x[b] - x[a]) * (y[j] - y[a]) - (y[b] - y[a]) * (x[j] - x[a]) >= 0:
+                hull.pop()
+            else:
+                break
+        hull.append(j)
+    return hull
+
+
+def test_upper_hull_mask_matches_reference_monotone_chain():
+    rng = np.random.default_rng(0)
+    spectra = _leaf_like(200) + 0.01 * rng.standard_normal((200, WAVELENGTHS.size))
+
+    mask = features.upper_hull_mask(spectra, WAVELENGTHS)
+
+    for i, spectrum in enumerate(spectra):
+        assert np.nonzero(mask[i])[0].tolist() == _reference_upper_hull(WAVELENGTHS, spectrum)
+
+
+def test_continuum_removed_bridges_interior_nan_band():
+    spectra = _leaf_like(1)
+    with_gap = spectra.copy()
+    with_gap[0, 150] = np.nan
+
+    mask = features.upper_hull_mask(with_gap, WAVELENGTHS)
+    cr = features.continuum_removed(with_gap, WAVELENGTHS)
+
+    assert not mask[0, 150]
+    assert np.nonzero(mask[0])[0].tolist() == _reference_upper_hull(WAVELENGTHS, with_gap[0])
+    assert np.isnan(cr[0, 150])
+    keep = np.arange(WAVELENGTHS.size) != 150
+    np.testing.assert_allclose(cr[0, keep], features.continuum_removed(spectra[:, keep], WAVELENGTHS[keep])[0])
+
+
+def test_red_edge_position_tracks_inflection_point():
+    spectra = np.vstack([_leaf_like(1, edge_nm=705.0), _leaf_like(1, edge_nm=725.0)])
+
+    rep = features.red_edge_position(spectra, WAVELENGTHS)
+
+    np.testing.assert_allclose(rep, [705.0, 725.0], atol=1.0)
+
+
+def test_feature_bank_reports_depth_and_nan_outside_sensor_range():
+    bank = features.feature_bank(_leaf_like(), WAVELENGTHS)
+
+    assert set(bank) >= {"rep_nm", "red_edge_slope", "water_970_depth", "water_970_area", "water_970_center_nm"}
+    assert all(values.shape == (4,) for values in bank.values())
+    assert np.all(bank["water_970_depth"] > 0.1)
+    np.testing.assert_allclose(bank["water_970_center_nm"], 970.0, atol=4.0)
+    assert np.all(np.isnan(bank["water_1200_depth"]))
+
+
+def test_savgol_derivative_rejects_too_few_bands():
+    with pytest.raises(ValueError):
+        features.savgol_derivative(np.ones((2, 2)), [500.0, 510.0])
+
+
+def test_feature_bank_isolates_degenerate_rows():
+    spectra = _leaf_like(3)
+    spectra[1] = 0.0
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        bank = features.feature_bank(spectra, WAVELENGTHS)
+
+    for name in ("water_970_depth", "water_970_area", "water_970_center_nm"):
+        assert np.isnan(bank[name][1])
+        assert np.all(np.isfinite(bank[name][[0, 2]]))
+
+
+def test_feature_bank_handles_nan_bands_and_all_nan_rows():
+    spectra = _leaf_like(3)
+    clean = features.feature_bank(spectra, WAVELENGTHS)
+    red_edge_band = int(np.argmin(np.abs(WAVELENGTHS - 715.0)))
+    water_band = int(np.argmin(np.abs(WAVELENGTHS - 960.0)))
+    spectra[0, [red_edge_band, water_band]] = np.nan
+    spectra[1] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        bank = features.feature_bank(spectra, WAVELENGTHS)
+
+    assert all(np.isnan(values[1]) for values in bank.values())
+    for name in ("rep_nm", "red_edge_slope", "water_970_depth", "water_970_center_nm"):
+        assert np.isfinite(bank[name][0])
+        np.testing.assert_allclose(bank[name][[0, 2]], clean[name][[0, 2]], rtol=0.05)
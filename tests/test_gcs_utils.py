@@ -30,6 +30,22 @@ class GcsUtilsTest(unittest.TestCase):
             mock_bucket.blob.assert_any_call("my-prefix/file1.txt")
             mock_bucket.blob.assert_any_call("my-prefix/subdir/file2.txt")
 
+    @patch("enzyme_tech.gcs_utils.storage.Client")
+    def test_upload_files_only_selected_paths(self, mock_storage_client):
+        mock_bucket = MagicMock()
+        mock_storage_client.return_value.bucket.return_value = mock_bucket
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "file1.txt"), "w") as f:
+                f.write("file1 content")
+            os.makedirs(os.path.join(tmpdir, "subdir"))
+            with open(os.path.join(tmpdir, "subdir", "file2.txt"), "w") as f:
+                f.write("file2 content")
+
+            gcs_utils.upload_files("my-bucket", tmpdir, "my-prefix", relative_paths=["subdir/file2.txt"])
+
+            mock_bucket.blob.assert_called_once_with("my-prefix/subdir/file2.txt")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,239 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from smart_agriculture import inventory, spectra, watch
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _write_pair(directory, stem, payload=b"cube"):
+    (directory / f"{stem}.hdr").write_text("ENVI")
+    (directory / f"{stem}.bil").write_bytes(payload)
+
+
+def test_scan_pairs_requires_both_halves(tmp_path):
+    _write_pair(tmp_path, "leaf_VISNIR_D1")
+    (tmp_path / "nested").mkdir()
+    _write_pair(tmp_path / "nested", "cloth_VISNIR_D1")
+    (tmp_path / "orphan_VISNIR_D1.hdr").write_text("ENVI")
+    (tmp_path / "0dai_2hr_swir_bc_run1.bil.hdr").write_text("ENVI")
+    (tmp_path / "0dai_2hr_swir_bc_run1.bil").write_bytes(b"cube")
+
+    pairs = watch.scan_pairs(tmp_path)
+
+    assert sorted(p.hdr_path.name for p in pairs.values()) == [
+        "0dai_2hr_swir_bc_run1.bil.hdr",
+        "cloth_VISNIR_D1.hdr",
+        "leaf_VISNIR_D1.hdr",
+    ]
+
+
+def test_debouncer_waits_for_stable_signature(tmp_path):
+    clock = FakeClock()
+    debouncer = watch.PairDebouncer(settle_seconds=5, clock=clock)
+    _write_pair(tmp_path, "leaf_VISNIR_D1")
+
+    assert debouncer.update(watch.scan_pairs(tmp_path)) == []
+    clock.now += 3
+    (tmp_path / "leaf_VISNIR_D1.bil").write_bytes(b"cube-still-writing")
+    assert debouncer.update(watch.scan_pairs(tmp_path)) == []
+    clock.now += 3
+    assert debouncer.update(watch.scan_pairs(tmp_path)) == []
+    clock.now += 3
+
+    ready = debouncer.update(watch.scan_pairs(tmp_path))
+
+    assert [p.hdr_path.name for p in ready] == ["leaf_VISNIR_D1.hdr"]
+
+
+def test_watcher_exports_new_samples_once_across_restarts(tmp_path, monkeypatch):
+    data_dir, out_dir, reports_dir = tmp_path / "data", tmp_path / "out", tmp_path / "reports"
+    data_dir.mkdir()
+    _write_pair(data_dir, "leaf_VISNIR_D1")
+    _write_pair(data_dir, "cloth_VISNIR_D1")
+
+    wl = np.array([531.0, 570.0, 670.0, 800.0])
+    cubes = {
+        "leaf_VISNIR_D1": np.full((2, 2, 4), [0.2, 0.3, 0.1, 0.6]),
+        "cloth_VISNIR_D1": np.ones((2, 2, 4)),
+    }
+    loaded = []
+
+    def fake_load_cube(hdr_path):
+        loaded.append(hdr_path)
+        return cubes[hdr_path.rsplit("/", 1)[-1][:-4]], wl
+
+    monkeypatch.setattr(spectra, "load_cube", fake_load_cube)
+    landed_at = watch.scan_pairs(data_dir)[str(data_dir / "leaf_VISNIR_D1.hdr")].landed_at
+
+    def run_watcher():
+        clock = FakeClock(now=landed_at)
+        watcher = watch.CubeWatcher(data_dir, out_dir, reports_dir, settle_seconds=1, workers=2, clock=clock)
+        watcher.start()
+        watcher.poll_once()
+        clock.now += 2
+        watcher.poll_once()
+        watcher.stop()
+        return watcher
+
+    first = run_watcher()
+
+    assert first.latencies == [2.0]
+    meta = pd.read_csv(out_dir / "hsi_meta.csv")
+    assert sorted(meta["hdr_path"].str.rsplit("/", n=1).str[-1]) == ["cloth_VISNIR_D1.hdr", "leaf_VISNIR_D1.hdr"]
+    spectrum = pd.read_csv(out_dir / "leaf_VISNIR_D1_spectrum.csv")
+    np.testing.assert_allclose(spectrum["refl_norm"], [0.2, 0.3, 0.1, 0.6])
+    features = pd.read_csv(out_dir / watch.FEATURES_FILENAME)
+    assert features["ndvi"].iloc[0] == (0.6 - 0.1) / (0.6 + 0.1)
+    assert np.isnan(features["ndwi"].iloc[0])
+    latency = pd.read_csv(reports_dir / watch.LATENCY_FILENAME)
+    assert latency["hdr_file"].tolist() == ["leaf_VISNIR_D1.hdr"]
+    assert latency["latency_s"].tolist() == [2.0]
+    calls = len(loaded)
+
+    run_watcher()
+
+    assert len(loaded) == calls
+    assert len(pd.read_csv(out_dir / "hsi_meta.csv")) == 2
+
+
+def _settle_and_poll(watcher, clock):
+    watcher.poll_once()
+    clock.now += 2
+    queued = watcher.poll_once()
+    clock.now += 2
+    return queued
+
+
+def test_watcher_does_not_requeue_pair_while_worker_is_busy(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    _write_pair(data_dir, "leaf_VISNIR_D1")
+    release = threading.Event()
+
+    def slow_load_cube(hdr_path):
+        release.wait(5)
+        return np.ones((1, 1, 3)), np.array([500.0, 600.0, 700.0])
+
+    monkeypatch.setattr(spectra, "load_cube", slow_load_cube)
+    clock = FakeClock()
+    watcher = watch.CubeWatcher(data_dir, tmp_path / "out", tmp_path / "reports", settle_seconds=1, workers=1, clock=clock)
+    watcher.start()
+
+    assert _settle_and_poll(watcher, clock) == 1
+    assert _settle_and_poll(watcher, clock) == 0
+    release.set()
+    watcher.stop()
+
+    assert len(pd.read_csv(tmp_path / "out" / watch.FEATURES_FILENAME)) == 1
+
+
+def test_watcher_gives_up_after_max_attempts(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    _write_pair(data_dir, "leaf_VISNIR_D1")
+    attempts = []
+
+    def broken_load_cube(hdr_path):
+        attempts.append(hdr_path)
+        raise ValueError("corrupt cube")
+
+    monkeypatch.setattr(spectra, "load_cube", broken_load_cube)
+    clock = FakeClock()
+    watcher = watch.CubeWatcher(
+        data_dir, tmp_path / "out", tmp_path / "reports", settle_seconds=1, workers=1, max_attempts=2, clock=clock
+    )
+    watcher.start()
+    for _ in range(4):
+        _settle_and_poll(watcher, clock)
+        watcher._queue.join()
+    watcher.stop()
+
+    assert len(attempts) == 2
+    restarted = watch.CubeWatcher(data_dir, tmp_path / "out", tmp_path / "reports", max_attempts=2)
+    assert restarted.state.gave_up(next(iter(watch.scan_pairs(data_dir).values())))
+
+
+def test_watcher_reexports_samples_when_reference_lands_later(tmp_path, monkeypatch):
+    data_dir, out_dir = tmp_path / "data", tmp_path / "out"
+    data_dir.mkdir()
+    wl = np.array([500.0, 600.0, 700.0])
+    cubes = {"leaf_VISNIR_D1": np.full((1, 1, 3), 0.4), "cloth_VISNIR_D1": np.full((1, 1, 3), 0.8)}
+    monkeypatch.setattr(spectra, "load_cube", lambda hdr_path: (cubes[hdr_path.rsplit("/", 1)[-1][:-4]], wl))
+    clock = FakeClock()
+    watcher = watch.CubeWatcher(data_dir, out_dir, tmp_path / "reports", settle_seconds=1, workers=1, clock=clock)
+    watcher.start()
+
+    _write_pair(data_dir, "leaf_VISNIR_D1")
+    _settle_and_poll(watcher, clock)
+    watcher._queue.join()
+    spectrum_path = out_dir / "leaf_VISNIR_D1_spectrum.csv"
+    assert set(pd.read_csv(spectrum_path)["ref_file"]) == {"NONE"}
+
+    _write_pair(data_dir, "cloth_VISNIR_D1")
+    _settle_and_poll(watcher, clock)
+    watcher._queue.join()
+    assert watcher.poll_once() == 0
+    watcher.stop()
+
+    spectrum = pd.read_csv(spectrum_path)
+    np.testing.assert_allclose(spectrum["refl_norm"], 0.5)
+    assert spectrum["ref_file"].str.endswith("cloth_VISNIR_D1.hdr").all()
+    features = pd.read_csv(out_dir / watch.FEATURES_FILENAME)
+    assert len(features) == 1
+    assert features["ref_file"].iloc[0].endswith("cloth_VISNIR_D1.hdr")
+    assert len(pd.read_csv(tmp_path / "reports" / watch.LATENCY_FILENAME)) == 1
+
+
+def test_watcher_does_not_duplicate_rows_after_crash_before_ledger_save(tmp_path, monkeypatch):
+    data_dir, out_dir, reports_dir = tmp_path / "data", tmp_path / "out", tmp_path / "reports"
+    data_dir.mkdir()
+    _write_pair(data_dir, "leaf_VISNIR_D1")
+    monkeypatch.setattr(spectra, "load_cube", lambda hdr_path: (np.ones((1, 1, 3)), np.array([500.0, 600.0, 700.0])))
+    clock = FakeClock()
+    watcher = watch.CubeWatcher(data_dir, out_dir, reports_dir, settle_seconds=1, workers=1, clock=clock)
+
+    def crash(pair, ref_file=None):
+        raise OSError("killed before the ledger was saved")
+
+    monkeypatch.setattr(watcher.state, "mark_done", crash)
+    watcher.start()
+    _settle_and_poll(watcher, clock)
+    watcher.stop()
+    assert len(pd.read_csv(out_dir / watch.FEATURES_FILENAME)) == 1
+
+    restarted = watch.CubeWatcher(data_dir, out_dir, reports_dir, settle_seconds=1, workers=1, clock=clock)
+    restarted.start()
+    _settle_and_poll(restarted, clock)
+    restarted.stop()
+
+    assert restarted.state.is_done(next(iter(watch.scan_pairs(data_dir).values())))
+    assert len(pd.read_csv(out_dir / watch.FEATURES_FILENAME)) == 1
+    assert len(pd.read_csv(reports_dir / watch.LATENCY_FILENAME)) == 1
+
+
+def test_watcher_starts_from_empty_inventory_file(tmp_path, monkeypatch):
+    data_dir, out_dir = tmp_path / "data", tmp_path / "out"
+    data_dir.mkdir()
+    out_dir.mkdir()
+    (out_dir / "hsi_meta.csv").write_text("\n")
+    monkeypatch.setattr(spectra, "load_cube", lambda hdr_path: (np.ones((1, 1, 3)), np.array([500.0, 600.0, 700.0])))
+    _write_pair(data_dir, "leaf_VISNIR_D1")
+    clock = FakeClock()
+    watcher = watch.CubeWatcher(data_dir, out_dir, tmp_path / "reports", settle_seconds=1, workers=1, clock=clock)
+
+    watcher.start()
+    _settle_and_poll(watcher, clock)
+    watcher.stop()
+
+    meta = pd.read_csv(out_dir / "hsi_meta.csv")
+    assert list(meta.columns) == inventory.INVENTORY_COLUMNS
+    assert meta["hdr_path"].str.endswith("leaf_VISNIR_D1.hdr").tolist() == [True]